@@ -0,0 +1,28 @@
+import openmc
+from openmc_source_plotter import (
+    get_gamma_emission,
+    get_gamma_emission_labels,
+    plot_gamma_emission_spectrum,
+)
+
+# this path will need changing to point to your chain file
+# openmc.config["chain_file"] = "chain-endf.xml"
+
+my_material = openmc.Material()
+my_material.add_nuclide("Xe135", 1e-12)
+my_material.add_nuclide("U235", 1)
+my_material.add_nuclide("U238", 1)
+my_material.add_nuclide("Co60", 1e-9)
+my_material.volume = 1  # must be set so number of atoms can be found
+
+# the line energies and intensities are numpy arrays that can be reused
+energies, intensities = get_gamma_emission(my_material)
+
+# adds labels to the most active 3 gamma energies
+figure = plot_gamma_emission_spectrum(
+    energies,
+    intensities,
+    labels=get_gamma_emission_labels(my_material, label_top=3),
+    xaxis_type="log",
+)
+figure.show()
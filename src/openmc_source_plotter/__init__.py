@@ -15,3 +15,4 @@ __all__ = ["__version__"]
 
 from .core import *
 from .material import *
+from .compare import *
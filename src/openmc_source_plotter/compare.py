@@ -0,0 +1,167 @@
+"""Provides functions for comparing the sampled distributions of two sources"""
+
+import typing
+import numpy as np
+import plotly.graph_objects
+
+from .core import _get_particle_arrays, _get_energy_bin_edges, _histogram_energy
+
+
+def _ks_statistic(values_a: np.ndarray, values_b: np.ndarray) -> float:
+    """Two sample Kolmogorov-Smirnov statistic, the largest difference
+    between the empirical cumulative distributions of the samples."""
+    values_a = np.sort(values_a)
+    values_b = np.sort(values_b)
+    all_values = np.concatenate([values_a, values_b])
+    cdf_a = np.searchsorted(values_a, all_values, side="right") / values_a.size
+    cdf_b = np.searchsorted(values_b, all_values, side="right") / values_b.size
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+
+def _wasserstein_distance(values_a: np.ndarray, values_b: np.ndarray) -> float:
+    """First Wasserstein (earth mover's) distance between two samples, the
+    area between their empirical cumulative distributions."""
+    values_a = np.sort(values_a)
+    values_b = np.sort(values_b)
+    all_values = np.sort(np.concatenate([values_a, values_b]))
+    deltas = np.diff(all_values)
+    cdf_a = np.searchsorted(values_a, all_values[:-1], side="right") / values_a.size
+    cdf_b = np.searchsorted(values_b, all_values[:-1], side="right") / values_b.size
+    return float(np.sum(np.abs(cdf_a - cdf_b) * deltas))
+
+
+def _chi_square(counts_a: np.ndarray, counts_b: np.ndarray) -> float:
+    """Two sample chi-square statistic between binned counts, allowing for
+    the two samples containing a different total number of entries. Returns
+    inf if only one of the samples has entries in the bins."""
+    total_a = counts_a.sum()
+    total_b = counts_b.sum()
+    if total_a == 0 and total_b == 0:
+        raise ValueError("neither source has any energies within the energy bins")
+    if total_a == 0 or total_b == 0:
+        return float("inf")
+    both = counts_a + counts_b
+    mask = both > 0
+    numerator = (
+        np.sqrt(total_b / total_a) * counts_a[mask]
+        - np.sqrt(total_a / total_b) * counts_b[mask]
+    )
+    return float(np.sum(numerator**2 / both[mask]))
+
+
+def compare_sources(
+    this_a,
+    this_b,
+    n_samples: int = 2000,
+    prn_seed: int = 1,
+    energy_bins: typing.Union[str, np.array] = "auto",
+    n_energy_bins: int = 100,
+) -> dict:
+    """Samples two sources and computes distances between their energy
+    distributions along with the moments of their positions and directions.
+    Useful for checking a source definition has not changed between code
+    versions.
+
+    Args:
+        this_a: The openmc source, settings or model containing the first
+            source to compare
+        this_b: The openmc source, settings or model containing the second
+            source to compare
+        n_samples: The number of source samples to obtain from each source.
+        prn_seed: The pseudorandom number seed
+        energy_bins: Defaults to 'auto' which uses inbuilt auto binning in
+            Numpy on the combined samples. Bins can also be manually set by
+            passing in a numpy array of bin edges, 'log' or the name of a
+            group structure as in plot_source_energy. Used for the
+            chi-square statistic, which is inf if only one source has
+            energies within the bins, and the difference plot.
+        n_energy_bins: The number of bins to use when energy_bins is 'log'.
+
+    Returns:
+        dict containing the energy KS statistic, chi-square and Wasserstein
+        distance, the mean and standard deviation of the positions, the
+        mean direction of each source and the binned energy probabilities
+        which can be passed to plot_source_comparison.
+    """
+
+    data_a = _get_particle_arrays(this_a, n_samples, prn_seed)
+    data_b = _get_particle_arrays(this_b, n_samples, prn_seed)
+
+    bin_edges = _get_energy_bin_edges(
+        np.concatenate([data_a["E"], data_b["E"]]), energy_bins, n_energy_bins
+    )
+    counts_a = _histogram_energy(data_a["E"], bin_edges)
+    counts_b = _histogram_energy(data_b["E"], bin_edges)
+
+    return {
+        "energy_ks_statistic": _ks_statistic(data_a["E"], data_b["E"]),
+        "energy_chi_square": _chi_square(counts_a, counts_b),
+        "energy_wasserstein": _wasserstein_distance(data_a["E"], data_b["E"]),
+        "energy_mean_a": float(data_a["E"].mean()),
+        "energy_mean_b": float(data_b["E"].mean()),
+        "position_mean_a": data_a["r"].mean(axis=0),
+        "position_mean_b": data_b["r"].mean(axis=0),
+        "position_std_a": data_a["r"].std(axis=0),
+        "position_std_b": data_b["r"].std(axis=0),
+        "direction_mean_a": data_a["u"].mean(axis=0),
+        "direction_mean_b": data_b["u"].mean(axis=0),
+        "energy_bin_edges": bin_edges,
+        "energy_probability_a": counts_a / max(counts_a.sum(), 1),
+        "energy_probability_b": counts_b / max(counts_b.sum(), 1),
+    }
+
+
+def plot_source_comparison(
+    comparison: dict,
+    figure: plotly.graph_objects.Figure = None,
+    names: typing.Tuple[str, str] = ("a", "b"),
+    xaxis_type: str = "linear",
+    xaxis_units: str = "MeV",
+):
+    """makes a plot of the binned energy probabilities of two compared
+    sources along with their difference. Uses the results of
+    compare_sources so the sources are not sampled again.
+
+    Args:
+        comparison: The dictionary returned by compare_sources.
+        figure: Optional base plotly figure to use for the plot. Defaults to
+            None which makes a new figure for the plot.
+        names: the legend names to use for the two sources
+        xaxis_type: The type (scale) to use for the X axis. Options are 'log'
+            or 'linear.
+        xaxis_units: The units to use for the x axis. Options are 'eV' or 'MeV'.
+    """
+
+    if xaxis_units not in ["eV", "MeV"]:
+        raise ValueError(f"xaxis_units must be either 'eV' or 'MeV' not {xaxis_units}")
+
+    if figure is None:
+        figure = plotly.graph_objects.Figure()
+        figure.update_layout(
+            title="Particle energy comparison",
+            xaxis={"title": f"Energy [{xaxis_units}]", "type": xaxis_type},
+            yaxis={"title": "Probability"},
+            showlegend=True,
+        )
+
+    energy = comparison["energy_bin_edges"][:-1]
+    if xaxis_units == "MeV":
+        energy = energy / 1e6
+
+    probability_a = comparison["energy_probability_a"]
+    probability_b = comparison["energy_probability_b"]
+
+    for probability, name in zip(
+        [probability_a, probability_b, probability_a - probability_b],
+        [names[0], names[1], f"{names[0]} - {names[1]}"],
+    ):
+        figure.add_trace(
+            plotly.graph_objects.Scatter(
+                x=energy,
+                y=probability,
+                line={"shape": "hv"},
+                name=name,
+            )
+        )
+
+    return figure
@@ -2,11 +2,15 @@
 
 """Provides functions for plotting source information"""
 
+import functools
 import typing
 from tempfile import TemporaryDirectory
+import h5py
 import numpy as np
+from numpy.lib import recfunctions
 import openmc
 import openmc.lib
+import openmc.mgxs
 import plotly.graph_objects
 
 import pkg_resources
@@ -66,6 +70,197 @@ def sample_initial_particles(this, n_samples: int = 1000, prn_seed: int = None):
     return particles
 
 
+def _get_source_file(this) -> typing.Optional[str]:
+    """returns the path of the HDF5 source file if the source is a single
+    openmc.FileSource without constraints, otherwise None. Constrained
+    sources are left to OpenMC to sample so the constraints are applied."""
+    if isinstance(this, openmc.Model):
+        this = this.settings
+    if isinstance(this, openmc.Settings):
+        if len(this.source) != 1:
+            return None
+        this = this.source[0]
+    if isinstance(this, openmc.FileSource) and this.path is not None:
+        # constraints were added in openmc 0.15
+        if getattr(this, "constraints", None):
+            return None
+        if h5py.is_hdf5(this.path):
+            return this.path
+    return None
+
+
+def _read_source_bank(
+    path: str,
+    n_samples: int = 1000,
+    prn_seed: int = None,
+    chunk_size: int = 1000000,
+) -> np.ndarray:
+    """reads a random selection of particles from the source_bank of an
+    OpenMC HDF5 source file without reading the whole file into memory.
+    Contiguous datasets are memory mapped, for others only the HDF5 chunks
+    holding the selected particles are read.
+
+    Args:
+        path: The path of the HDF5 source file.
+        n_samples: The number of particles to read. All particles are read
+            if the file contains fewer particles than this.
+        prn_seed: The pseudorandom number seed used to select particles.
+        chunk_size: The number of particles spanned by each read from
+            chunked or compressed datasets.
+
+    Returns:
+        numpy structured array of the selected source bank entries.
+    """
+    with h5py.File(path, "r") as f:
+        dataset = f["source_bank"]
+        n_particles = dataset.shape[0]
+
+        if n_samples >= n_particles:
+            indices = np.arange(n_particles)
+        else:
+            rng = np.random.default_rng(prn_seed)
+            indices = np.sort(rng.choice(n_particles, n_samples, replace=False))
+
+        offset = dataset.id.get_offset()
+        contiguous = (
+            offset is not None
+            and dataset.chunks is None
+            and dataset.id.get_storage_size() == dataset.dtype.itemsize * n_particles
+        )
+        if contiguous:
+            bank = np.memmap(
+                path, mode="r", dtype=dataset.dtype, offset=offset, shape=(n_particles,)
+            )
+            return np.array(bank[indices])
+
+        selected = []
+        for start in range(0, n_particles, chunk_size):
+            stop = min(start + chunk_size, n_particles)
+            first, last = np.searchsorted(indices, [start, stop])
+            if first == last:
+                continue
+            if last - first == stop - start:
+                selected.append(dataset[start:stop])
+            else:
+                # a point selection only reads the HDF5 chunks holding the
+                # selected particles
+                selected.append(dataset[indices[first:last]])
+        if not selected:
+            return np.zeros(0, dtype=dataset.dtype)
+        return np.concatenate(selected)
+
+
+def _get_particle_arrays(this, n_samples: int = 1000, prn_seed: int = None):
+    """samples particles from the source and returns their energies,
+    positions and directions as numpy arrays. Sources that are a single
+    openmc.FileSource without constraints are read directly from the file
+    rather than sampled with OpenMC.
+
+    Args:
+        this: The openmc source, settings or model containing the source to plot
+        n_samples: The number of source samples to obtain.
+        prn_seed: The pseudorandom number seed.
+
+    Returns:
+        dict with keys "E" (shape (n,)), "r" and "u" (shape (n, 3)).
+    """
+    path = _get_source_file(this)
+    if path is not None:
+        bank = _read_source_bank(path, n_samples, prn_seed)
+        return {
+            "E": bank["E"].astype(float),
+            "r": recfunctions.structured_to_unstructured(bank["r"], float),
+            "u": recfunctions.structured_to_unstructured(bank["u"], float),
+        }
+
+    particles = sample_initial_particles(this, n_samples, prn_seed)
+
+    return {
+        "E": np.fromiter((p.E for p in particles), dtype=float, count=len(particles)),
+        "r": np.array([p.r for p in particles], dtype=float).reshape(-1, 3),
+        "u": np.array([p.u for p in particles], dtype=float).reshape(-1, 3),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _group_structure_bin_edges(group_structure: str) -> np.ndarray:
+    """returns the cached, read only bin edges of a named group structure"""
+    bin_edges = np.array(openmc.mgxs.GROUP_STRUCTURES[group_structure], dtype=float)
+    bin_edges.flags.writeable = False
+    return bin_edges
+
+
+def _get_energy_bin_edges(
+    e_values: np.ndarray,
+    energy_bins: typing.Union[str, np.array] = "auto",
+    n_energy_bins: int = 100,
+) -> np.ndarray:
+    """finds the energy bin edges to histogram the sampled energies with.
+
+    Args:
+        e_values: The sampled particle energies in eV.
+        energy_bins: 'log' for log uniform bins spanning the sampled
+            energies, the name of a group structure in
+            openmc.mgxs.GROUP_STRUCTURES, a numpy array of bin edges or any
+            other binning strategy accepted by numpy.histogram_bin_edges.
+        n_energy_bins: The number of bins to use when energy_bins is 'log'.
+    """
+
+    if isinstance(energy_bins, str):
+        if energy_bins in openmc.mgxs.GROUP_STRUCTURES:
+            return _group_structure_bin_edges(energy_bins)
+        if energy_bins == "log":
+            lowest = e_values.min()
+            highest = e_values.max()
+            if lowest <= 0:
+                raise ValueError("log energy_bins require all energies to be positive")
+            if lowest == highest:
+                # widens the range so a monoenergetic source still has a bin
+                lowest, highest = lowest * 0.99, highest * 1.01
+            return np.geomspace(lowest, highest, n_energy_bins + 1)
+
+    return np.histogram_bin_edges(e_values, bins=energy_bins)
+
+
+def _histogram_energy(
+    e_values: np.ndarray, bin_edges: np.ndarray, block_size: int = 65536
+) -> np.ndarray:
+    """counts the energies falling into each bin, matching numpy.histogram.
+    For evenly or log evenly spaced bin edges the bin of each energy is
+    calculated directly from the spacing, in blocks so the temporary arrays
+    stay small. Other bin edges are passed to numpy.histogram."""
+
+    n_bins = len(bin_edges) - 1
+    first, last = bin_edges[0], bin_edges[-1]
+
+    if np.allclose(np.diff(bin_edges), (last - first) / n_bins):
+        log_spaced = False
+        scale = n_bins / (last - first)
+    elif first > 0 and np.allclose(
+        np.diff(np.log(bin_edges)), np.log(last / first) / n_bins
+    ):
+        log_spaced = True
+        scale = n_bins / np.log(last / first)
+    else:
+        return np.histogram(e_values, bin_edges)[0]
+
+    counts = np.zeros(n_bins, dtype=np.intp)
+    for start in range(0, len(e_values), block_size):
+        block = e_values[start : start + block_size]
+        block = block[(block >= first) & (block <= last)]
+        if log_spaced:
+            indices = (np.log(block / first) * scale).astype(np.intp)
+        else:
+            indices = ((block - first) * scale).astype(np.intp)
+        # numpy.histogram includes the upper edge in the last bin
+        indices[indices >= n_bins] = n_bins - 1
+        # corrects energies put in the neighbouring bin by round off
+        indices -= block < bin_edges[indices]
+        indices += (block >= bin_edges[indices + 1]) & (indices < n_bins - 1)
+        counts += np.bincount(indices, minlength=n_bins)
+    return counts
+
+
 def plot_source_energy(
     this,
     figure: plotly.graph_objects.Figure = None,
@@ -76,6 +271,8 @@ def plot_source_energy(
     yaxis_type: str = "linear",
     xaxis_type: str = "linear",
     xaxis_units: str = "MeV",
+    n_energy_bins: int = 100,
+    per_lethargy: bool = False,
 ):
     """makes a plot of the initial creation positions of an OpenMC source
 
@@ -91,13 +288,18 @@ def plot_source_energy(
         prn_seed: The pseudorandom number seed
         energy_bins: Defaults to 'auto' which uses inbuilt auto binning in
             Numpy bins can also be manually set by passing in a numpy array
-            of bin edges.
+            of bin edges. 'log' makes n_energy_bins log uniform bins spanning
+            the sampled energies and the name of a group structure in
+            openmc.mgxs.GROUP_STRUCTURES (e.g. 'CCFE-709') uses those edges.
         name: the legend name to use
         yaxis_type: The type (scale) to use for the Y axis. Options are 'log'
             or 'linear.
         xaxis_type: The type (scale) to use for the Y axis. Options are 'log'
             or 'linear.
         xaxis_units: The units to use for the x axis. Options are 'eV' or 'MeV'.
+        n_energy_bins: The number of bins to use when energy_bins is 'log'.
+        per_lethargy: Divides the probability in each bin by the bin's
+            lethargy width, ln(E_upper / E_lower).
     """
 
     if xaxis_units not in ["eV", "MeV"]:
@@ -108,16 +310,29 @@ def plot_source_energy(
         figure.update_layout(
             title="Particle energy",
             xaxis={"title": f"Energy [{xaxis_units}]", "type": xaxis_type},
-            yaxis={"title": "Probability", "type": yaxis_type},
+            yaxis={
+                "title": (
+                    "Probability per unit lethargy" if per_lethargy else "Probability"
+                ),
+                "type": yaxis_type,
+            },
             showlegend=True,
         )
 
-    data = sample_initial_particles(this, n_samples, prn_seed)
+    e_values = _get_particle_arrays(this, n_samples, prn_seed)["E"]
+
+    bin_edges = _get_energy_bin_edges(e_values, energy_bins, n_energy_bins)
 
-    e_values = [particle.E for particle in data]
+    # Calculate probability of source energies falling in each bin
+    counts = _histogram_energy(e_values, bin_edges)
+    probability = counts / counts.sum()
 
-    # Calculate pdf for source energies
-    probability, bin_edges = np.histogram(e_values, bins=energy_bins, density=True)
+    if per_lethargy:
+        if bin_edges[0] <= 0:
+            raise ValueError(
+                "per_lethargy requires all energy bin edges to be positive"
+            )
+        probability = probability / np.log(bin_edges[1:] / bin_edges[:-1])
 
     # scaling by strength
     if isinstance(this, openmc.SourceBase):
@@ -129,7 +344,7 @@ def plot_source_energy(
     figure.add_trace(
         plotly.graph_objects.Scatter(
             x=energy,
-            y=probability * np.diff(bin_edges),
+            y=probability,
             line={"shape": "hv"},
             hoverinfo="text",
             name=name,
@@ -166,21 +381,21 @@ def plot_source_position(
             showlegend=True,
         )
 
-    data = sample_initial_particles(this, n_samples, prn_seed)
+    data = _get_particle_arrays(this, n_samples, prn_seed)
 
-    text = ["Energy = " + str(particle.E) + " eV" for particle in data]
+    text = ["Energy = " + str(e) + " eV" for e in data["E"]]
 
     figure.add_trace(
         plotly.graph_objects.Scatter3d(
-            x=[particle.r[0] for particle in data],
-            y=[particle.r[1] for particle in data],
-            z=[particle.r[2] for particle in data],
+            x=data["r"][:, 0],
+            y=data["r"][:, 1],
+            z=data["r"][:, 2],
             hovertext=text,
             text=text,
             mode="markers",
             marker={
                 "size": 2,
-                "color": [particle.E for particle in data],
+                "color": data["E"],
             },
         )
     )
@@ -213,18 +428,10 @@ def plot_source_direction(
     figure = plotly.graph_objects.Figure()
     figure.update_layout(title="Particle initial directions")
 
-    data = sample_initial_particles(this, n_samples, prn_seed)
+    data = _get_particle_arrays(this, n_samples, prn_seed)
 
-    biggest_coord = max(
-        max([particle.r[0] for particle in data]),
-        max([particle.r[1] for particle in data]),
-        max([particle.r[2] for particle in data]),
-    )
-    smallest_coord = min(
-        min([particle.r[0] for particle in data]),
-        min([particle.r[1] for particle in data]),
-        min([particle.r[2] for particle in data]),
-    )
+    biggest_coord = data["r"].max()
+    smallest_coord = data["r"].min()
 
     figure.add_trace(
         {
@@ -239,12 +446,12 @@ def plot_source_direction(
         {
             "type": "cone",
             "cauto": False,
-            "x": [particle.r[0] for particle in data],
-            "y": [particle.r[1] for particle in data],
-            "z": [particle.r[2] for particle in data],
-            "u": [particle.u[0] for particle in data],
-            "v": [particle.u[1] for particle in data],
-            "w": [particle.u[2] for particle in data],
+            "x": data["r"][:, 0],
+            "y": data["r"][:, 1],
+            "z": data["r"][:, 2],
+            "u": data["u"][:, 0],
+            "v": data["u"][:, 1],
+            "w": data["u"][:, 2],
             "cmin": 0,
             "cmax": 1,
             "anchor": "tail",
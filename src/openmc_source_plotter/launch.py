@@ -0,0 +1,370 @@
+"""Command line tool for rendering source plots for many input files"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+import typing
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+HASH_FILENAME = "openmc_source_plotter_hashes.json"
+SOURCE_PLOTS = ["energy", "position", "direction"]
+MATERIAL_PLOTS = ["gamma"]
+FORMATS = ["png", "html", "json"]
+
+
+def _input_kind(filename: Path) -> typing.Optional[str]:
+    """returns the root tag of an xml file if it is a model, settings or
+    materials file, otherwise None"""
+    try:
+        for _, element in ET.iterparse(filename, events=("start",)):
+            if element.tag in ("model", "settings", "materials"):
+                return element.tag
+            return None
+    except ET.ParseError:
+        return None
+
+
+def find_inputs(input_dir: Path) -> typing.List[typing.Tuple[Path, str]]:
+    """finds the model, settings and materials xml files in a directory
+    and its subdirectories.
+
+    Args:
+        input_dir: The directory to search.
+
+    Returns:
+        list of (filename, kind) tuples sorted by filename.
+    """
+    inputs = []
+    for filename in sorted(Path(input_dir).rglob("*.xml")):
+        kind = _input_kind(filename)
+        if kind is not None:
+            inputs.append((filename, kind))
+    return inputs
+
+
+def referenced_files(filename: Path) -> typing.List[Path]:
+    """finds the source files and compiled source libraries referenced by
+    the sources in a model or settings xml file. Relative paths are
+    resolved against the directory of the xml file.
+
+    Args:
+        filename: The model or settings xml file.
+
+    Returns:
+        list of the referenced file paths.
+    """
+    files = []
+    for source in ET.parse(filename).getroot().iter("source"):
+        for tag in ("file", "library"):
+            for value in (source.get(tag), source.findtext(tag)):
+                if value:
+                    files.append(Path(filename).parent / value.strip())
+    return files
+
+
+def input_hash(
+    filename: Path, options: dict, extra_files: typing.Sequence[Path] = ()
+) -> str:
+    """hashes the contents of an input file, the size and modification time
+    of the files its sources reference and of any extra files, such as the
+    depletion chain file, and the plotting options so that unchanged inputs
+    can be skipped"""
+    sha = hashlib.sha256()
+    sha.update(Path(filename).read_bytes())
+    for referenced in referenced_files(filename) + [Path(f) for f in extra_files]:
+        sha.update(str(referenced.resolve()).encode())
+        if referenced.exists():
+            stat = referenced.stat()
+            sha.update(f"{stat.st_size} {stat.st_mtime_ns}".encode())
+    sha.update(json.dumps(options, sort_keys=True).encode())
+    return sha.hexdigest()
+
+
+def _chain_file() -> typing.Optional[Path]:
+    """returns the depletion chain file the gamma lines are found from"""
+    import openmc
+
+    chain_file = openmc.config.get("chain_file")
+    return None if chain_file is None else Path(chain_file)
+
+
+def _write_hashes(hash_file: Path, hashes: dict):
+    """writes the input hashes via a temporary file so an interrupted run
+    never leaves a partly written hash file"""
+    temporary = hash_file.with_name(hash_file.name + ".tmp")
+    temporary.write_text(json.dumps(hashes, indent=2, sort_keys=True))
+    os.replace(temporary, hash_file)
+
+
+def _resolve_source_paths(settings, directory: Path):
+    """makes the relative file source and compiled source library paths of
+    the settings absolute, relative to the directory they were loaded from"""
+    for source in settings.source:
+        for attribute in ("path", "library"):
+            value = getattr(source, attribute, None)
+            if value is not None and not Path(value).is_absolute():
+                setattr(source, attribute, str(Path(directory) / value))
+
+
+def _write_figure(figure, stem: Path, formats: typing.List[str]) -> typing.List[str]:
+    """writes a plotly figure to each of the requested formats"""
+    written = []
+    for fmt in formats:
+        filename = f"{stem}.{fmt}"
+        if fmt == "png":
+            figure.write_image(filename)
+        elif fmt == "html":
+            figure.write_html(filename)
+        elif fmt == "json":
+            figure.write_json(filename)
+        written.append(filename)
+    return written
+
+
+def render_input(
+    filename: Path,
+    kind: str,
+    output_stem: Path,
+    plots: typing.List[str],
+    formats: typing.List[str],
+    n_samples: int,
+    prn_seed: int,
+    label_top: int = 0,
+) -> typing.List[str]:
+    """renders the requested plots for a single input file.
+
+    Args:
+        filename: The model, settings or materials xml file.
+        kind: The root tag of the xml file, 'model', 'settings' or 'materials'.
+        output_stem: The output path, without suffix, that the plot name
+            and format are appended to.
+        plots: The plots to render, any of 'energy', 'position', 'direction'
+            for model and settings files and 'gamma' for materials files.
+        formats: The formats to write, any of 'png', 'html' or 'json'.
+        n_samples: The number of source samples to obtain.
+        prn_seed: The pseudorandom number seed.
+        label_top: The number of highest activity gamma lines to label with
+            the nuclide that emits them. Defaults to 0 which adds no labels.
+
+    Returns:
+        list of the filenames written.
+    """
+    import openmc
+    from .core import plot_source_energy, plot_source_position, plot_source_direction
+    from .material import (
+        get_gamma_emission,
+        get_gamma_emission_labels,
+        plot_gamma_emission_spectrum,
+    )
+
+    filename = Path(filename).resolve()
+    output_stem = Path(output_stem).resolve()
+    written = []
+
+    # inputs are loaded from their own directory so relative paths within
+    # them resolve, then as sample_initial_particles writes a model.xml to
+    # the working directory each input is rendered in a temporary directory
+    cwd = os.getcwd()
+    os.chdir(filename.parent)
+    try:
+        if kind == "materials":
+            this = openmc.Materials.from_xml(filename)
+        elif kind == "model":
+            this = openmc.Model.from_model_xml(filename)
+            _resolve_source_paths(this.settings, filename.parent)
+        else:
+            this = openmc.Settings.from_xml(filename)
+            _resolve_source_paths(this, filename.parent)
+    finally:
+        os.chdir(cwd)
+
+    with TemporaryDirectory() as tmpdir:
+        os.chdir(tmpdir)
+        try:
+            if kind == "materials":
+                if "gamma" in plots:
+                    for material in this:
+                        figure = plot_gamma_emission_spectrum(
+                            *get_gamma_emission(material),
+                            labels=(
+                                get_gamma_emission_labels(material, label_top)
+                                if label_top
+                                else None
+                            ),
+                            name=material.name,
+                        )
+                        written += _write_figure(
+                            figure,
+                            Path(f"{output_stem}_gamma_{material.id}"),
+                            formats,
+                        )
+                return written
+
+            plot_functions = {
+                "energy": plot_source_energy,
+                "position": plot_source_position,
+                "direction": plot_source_direction,
+            }
+            for plot in plots:
+                if plot in plot_functions:
+                    figure = plot_functions[plot](
+                        this=this, n_samples=n_samples, prn_seed=prn_seed
+                    )
+                    written += _write_figure(
+                        figure, Path(f"{output_stem}_{plot}"), formats
+                    )
+        finally:
+            os.chdir(cwd)
+
+    return written
+
+
+def _render_task(task: dict) -> typing.Tuple[typing.List[str], float]:
+    """renders a task and returns the files written and the time taken"""
+    start = time.perf_counter()
+    written = render_input(**task["render"])
+    return written, time.perf_counter() - start
+
+
+def main(args: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Renders source plots for every model.xml, settings.xml and "
+            "materials.xml file found in a directory."
+        )
+    )
+    parser.add_argument(
+        "input_dir", type=Path, help="directory to search for xml files"
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        type=Path,
+        default=Path("source_plots"),
+        help="directory to write the plots to",
+    )
+    parser.add_argument(
+        "-p",
+        "--plots",
+        nargs="+",
+        choices=SOURCE_PLOTS + MATERIAL_PLOTS,
+        default=["energy"],
+        help="plots to render",
+    )
+    parser.add_argument(
+        "-f",
+        "--formats",
+        nargs="+",
+        choices=FORMATS,
+        default=["html"],
+        help="file formats to write, png requires the kaleido package",
+    )
+    parser.add_argument(
+        "-n", "--n-samples", type=int, default=2000, help="number of source samples"
+    )
+    parser.add_argument("--prn-seed", type=int, default=1, help="random number seed")
+    parser.add_argument(
+        "--label-top",
+        type=int,
+        default=0,
+        help="number of highest activity gamma lines to label, 0 for none",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of worker processes",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="render all inputs, even those unchanged since the last run",
+    )
+    args = parser.parse_args(args)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    hash_file = args.output_dir / HASH_FILENAME
+    previous_hashes = {}
+    if hash_file.exists():
+        previous_hashes = json.loads(hash_file.read_text())
+
+    options = {
+        "plots": sorted(args.plots),
+        "formats": sorted(args.formats),
+        "n_samples": args.n_samples,
+        "prn_seed": args.prn_seed,
+        "label_top": args.label_top,
+    }
+
+    tasks = []
+    hashes = dict(previous_hashes)
+    for filename, kind in find_inputs(args.input_dir):
+        applicable = MATERIAL_PLOTS if kind == "materials" else SOURCE_PLOTS
+        if not set(args.plots) & set(applicable):
+            continue
+        extra_files = []
+        if kind == "materials" and _chain_file() is not None:
+            extra_files.append(_chain_file())
+
+        relative = filename.relative_to(args.input_dir)
+        key = relative.as_posix()
+        digest = input_hash(filename, options, extra_files)
+        if not args.force and previous_hashes.get(key) == digest:
+            print(f"{key}: unchanged, skipped")
+            continue
+        # stale hashes are removed so a failed render is retried next time
+        hashes.pop(key, None)
+        # the input directory layout is mirrored so outputs can not clash
+        output_stem = args.output_dir / relative.with_suffix("")
+        output_stem.parent.mkdir(parents=True, exist_ok=True)
+        tasks.append(
+            {
+                "key": key,
+                "hash": digest,
+                "render": {
+                    "filename": filename,
+                    "kind": kind,
+                    "output_stem": output_stem,
+                    "plots": args.plots,
+                    "formats": args.formats,
+                    "n_samples": args.n_samples,
+                    "prn_seed": args.prn_seed,
+                    "label_top": args.label_top,
+                },
+            }
+        )
+
+    failures = 0
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(_render_task, task): task for task in tasks}
+        for future in concurrent.futures.as_completed(futures):
+            task = futures[future]
+            try:
+                written, elapsed = future.result()
+            except Exception as error:
+                failures += 1
+                print(f"{task['key']}: failed, {error}")
+                continue
+            hashes[task["key"]] = task["hash"]
+            # saved after each render so an interrupted run keeps its progress
+            _write_hashes(hash_file, hashes)
+            print(f"{task['key']}: {len(written)} files in {elapsed:.2f} s")
+
+    _write_hashes(hash_file, hashes)
+    print(
+        f"rendered {len(tasks) - failures} of {len(tasks)} inputs "
+        f"in {time.perf_counter() - start:.2f} s"
+    )
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
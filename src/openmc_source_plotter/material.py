@@ -1,5 +1,162 @@
+import typing
+import numpy as np
 import openmc
 import matplotlib.pyplot as plt
+import plotly.graph_objects
+
+
+def get_gamma_emission(material) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """gets the energies and intensities of the gamma lines emitted by the
+    unstable nuclides in a material.
+
+    Args:
+        material: The openmc.Material to find the gamma lines of. The volume
+            must be set so the number of atoms can be found.
+
+    Returns:
+        Tuple of numpy arrays of the line energies [eV] and their
+        intensities [Bq].
+    """
+    energy_dis = material.get_decay_photon_energy(clip_tolerance=0.0)
+    if energy_dis is None:
+        return np.array([]), np.array([])
+    return np.asarray(energy_dis.x, dtype=float), np.asarray(energy_dis.p, dtype=float)
+
+
+def get_gamma_emission_labels(
+    material, label_top: int
+) -> typing.List[typing.Tuple[str, float, float]]:
+    """finds the highest activity gamma lines in a material and the nuclide
+    that emits them.
+
+    Args:
+        material: The openmc.Material to find the gamma lines of.
+        label_top: The number of highest activity lines to return.
+
+    Returns:
+        list of (nuclide, intensity, energy) tuples sorted by intensity.
+    """
+    lines = []
+    atoms = material.get_nuclide_atoms()
+    for nuc, num_atoms in atoms.items():
+        source_per_atom = openmc.data.decay_photon_energy(nuc)
+        if source_per_atom is not None:
+            combo = openmc.data.combine_distributions([source_per_atom], [num_atoms])
+            lines += [(nuc, p, x) for p, x in zip(combo.p, combo.x)]
+
+    return sorted(lines, key=lambda x: x[1], reverse=True)[:label_top]
+
+
+def get_broadened_gamma_emission(
+    energies: np.ndarray,
+    intensities: np.ndarray,
+    energy_bins: np.ndarray,
+    fwhm: typing.Union[float, typing.Callable[[np.ndarray], np.ndarray]],
+    width_tolerance: float = 0.01,
+) -> np.ndarray:
+    """broadens gamma lines with a Gaussian detector resolution, giving the
+    spectrum a detector would measure. Lines are binned onto the energy
+    grid and grouped by resolution width, each group is then convolved
+    with a single Gaussian kernel using an FFT. Lines outside the energy
+    bins are ignored.
+
+    Args:
+        energies: The line energies [eV], for example from get_gamma_emission.
+        intensities: The line intensities [Bq], for example from
+            get_gamma_emission.
+        energy_bins: Evenly spaced energy bin edges [eV], for example from
+            np.linspace.
+        fwhm: The full width at half maximum of the detector resolution
+            [eV]. Either a constant or a function of the line energies.
+        width_tolerance: The relative difference in width permitted between
+            lines convolved with the same kernel.
+
+    Returns:
+        numpy array of the intensity [Bq] in each energy bin.
+    """
+
+    energies = np.asarray(energies, dtype=float)
+    intensities = np.asarray(intensities, dtype=float)
+    energy_bins = np.asarray(energy_bins, dtype=float)
+
+    n_bins = len(energy_bins) - 1
+    bin_width = (energy_bins[-1] - energy_bins[0]) / n_bins
+    if not np.allclose(np.diff(energy_bins), bin_width):
+        raise ValueError("energy_bins must be evenly spaced")
+
+    in_range = (energies >= energy_bins[0]) & (energies <= energy_bins[-1])
+    energies = energies[in_range]
+    intensities = intensities[in_range]
+    if energies.size == 0:
+        return np.zeros(n_bins)
+
+    # each line is shared between the two nearest bin centres so that it is
+    # not shifted by up to half a bin
+    position = (energies - energy_bins[0]) / bin_width - 0.5
+    lower = np.floor(position).astype(int)
+    upper_fraction = position - lower
+    upper = np.clip(lower + 1, 0, n_bins - 1)
+    lower = np.clip(lower, 0, n_bins - 1)
+
+    if callable(fwhm):
+        widths = np.asarray(fwhm(energies), dtype=float) * np.ones_like(energies)
+    else:
+        widths = np.full_like(energies, fwhm)
+    if np.any(widths <= 0):
+        raise ValueError("fwhm must be greater than zero")
+
+    # standard deviation of each line in units of bins
+    sigmas = widths / (2 * np.sqrt(2 * np.log(2)) * bin_width)
+    groups = np.round(np.log(sigmas) / np.log1p(width_tolerance)).astype(int)
+
+    # the kernels are wrapped around index zero, so padding the grid by the
+    # widest kernel's half width stops the convolution wrapping around. The
+    # padded length is rounded up to a power of two, the quickest FFT length
+    max_half_width = min(
+        int(np.ceil(5 * (1 + width_tolerance) ** groups.max())), n_bins
+    )
+    n_fft = 2 ** int(np.ceil(np.log2(n_bins + max_half_width)))
+    x = np.fft.fftfreq(n_fft, 1.0 / n_fft)
+
+    # convolution is linear so each group is summed in frequency space and
+    # a single inverse transform is needed
+    spectrum_fft = np.zeros(n_fft // 2 + 1, dtype=complex)
+    for group in np.unique(groups):
+        in_group = groups == group
+        sigma = (1 + width_tolerance) ** group
+        lines = np.bincount(
+            lower[in_group],
+            weights=intensities[in_group] * (1 - upper_fraction[in_group]),
+            minlength=n_bins,
+        ) + np.bincount(
+            upper[in_group],
+            weights=intensities[in_group] * upper_fraction[in_group],
+            minlength=n_bins,
+        )
+
+        kernel = np.exp(-0.5 * (x / sigma) ** 2)
+        kernel[np.abs(x) > 5 * sigma] = 0.0
+        kernel /= kernel.sum()
+
+        spectrum_fft += np.fft.rfft(lines, n_fft) * np.fft.rfft(kernel)
+
+    spectrum = np.fft.irfft(spectrum_fft, n_fft)[:n_bins]
+
+    # removes the round off noise of the FFT from empty regions
+    spectrum[spectrum < 0] = 0.0
+
+    return spectrum
+
+
+def _line_coordinates(
+    energies: np.ndarray, intensities: np.ndarray
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """converts lines into x, y coordinates that draw each line as a spike
+    from zero up to its intensity and back to zero"""
+    en = np.repeat(energies, 3)
+    probs = np.zeros(3 * len(intensities))
+    probs[1::3] = intensities
+    return en, probs
 
 
 def plot_gamma_emission(
@@ -20,70 +177,113 @@ def plot_gamma_emission(
     """
 
     plt.clf()
+    en, probs = _line_coordinates(*get_gamma_emission(material))
     if label_top:
-        energies_to_label = []
-        labels = []
-        possible_energies_to_label = []
         import lineid_plot
 
-        atoms = material.get_nuclide_atoms()
-        for nuc, num_atoms in atoms.items():
-            dists = []
-            probs = []
-            source_per_atom = openmc.data.decay_photon_energy(nuc)
-            if source_per_atom is not None:
-                dists.append(source_per_atom)
-                probs.append(num_atoms)
-                combo = openmc.data.combine_distributions(dists, probs)
-                for p, x in zip(combo.p, combo.x):
-                    possible_energies_to_label.append((nuc, p, x))
-
-        possible_energies_to_label = sorted(
-            possible_energies_to_label, key=lambda x: x[1], reverse=True
-        )[:label_top]
-        for entry in possible_energies_to_label:
-            energies_to_label.append(entry[2])
-            labels.append(entry[0])
-
-        probs = []
-        en = []
-        energy_dis = material.get_decay_photon_energy(clip_tolerance=0.0)
-        for p in energy_dis.p:
-            probs.append(0)
-            probs.append(p)
-            probs.append(0)
-        for x in energy_dis.x:
-            en.append(x)
-            en.append(x)
-            en.append(x)
-        # print(en)
-        # print(probs)
+        labelled_lines = get_gamma_emission_labels(material, label_top)
+
         lineid_plot.plot_line_ids(
             en,
-            # material.decay_photon_energy.x,
             probs,
-            # material.decay_photon_energy.p,
-            energies_to_label,
-            labels,
+            [entry[2] for entry in labelled_lines],
+            [entry[0] for entry in labelled_lines],
         )
 
     else:
-        probs = []
-        en = []
-        energy_dis = material.get_decay_photon_energy(clip_tolerance=0.0)
-        for p in energy_dis.p:
-            probs.append(0)
-            probs.append(p)
-            probs.append(0)
-        for x in energy_dis.x:
-            en.append(x)
-            en.append(x)
-            en.append(x)
-
-        # plt.scatter(energy_dis.x, energy_dis.p)
         plt.plot(en, probs)
-        # print(energy_dis.p)
-        # print(energy_dis.x)
     plt.xlabel("Energy [eV]")
     plt.ylabel("Activity [Bq/s]")
     return plt
+
+
+def plot_gamma_emission_spectrum(
+    energies: np.ndarray,
+    intensities: np.ndarray,
+    figure: plotly.graph_objects.Figure = None,
+    labels: typing.Optional[typing.List[typing.Tuple[str, float, float]]] = None,
+    name: typing.Optional[str] = None,
+    yaxis_type: str = "linear",
+    xaxis_type: str = "linear",
+    fwhm: typing.Union[None, float, typing.Callable[[np.ndarray], np.ndarray]] = None,
+    energy_bins: typing.Optional[np.ndarray] = None,
+):
+    """makes a plotly plot of gamma lines. Unlike plot_gamma_emission this
+    does not use the global pyplot state so several materials can be
+    plotted at once in different threads. Optionally the lines can be
+    broadened by a detector resolution using get_broadened_gamma_emission.
+
+    Args:
+        energies: The line energies [eV], for example from get_gamma_emission.
+        intensities: The line intensities [Bq], for example from
+            get_gamma_emission.
+        figure: Optional base plotly figure to use for the plot. Passing in
+            a pre made figure allows one to build up plots with from
+            multiple materials. Defaults to None which makes a new figure for
+            the plot.
+        labels: Optional list of (nuclide, intensity, energy) tuples to
+            annotate, for example from get_gamma_emission_labels. When fwhm
+            is set the labels are placed on the broadened spectrum.
+        name: the legend name to use
+        yaxis_type: The type (scale) to use for the Y axis. Options are 'log'
+            or 'linear.
+        xaxis_type: The type (scale) to use for the X axis. Options are 'log'
+            or 'linear.
+        fwhm: Optional full width at half maximum of the detector resolution
+            [eV], either a constant or a function of energy. Defaults to None
+            which plots the unbroadened lines.
+        energy_bins: Evenly spaced energy bin edges [eV] to use for the
+            broadened spectrum. Defaults to None which uses 8192 bins from 0
+            to just above the highest line energy.
+
+    Returns:
+        plotly Figure object.
+    """
+
+    if figure is None:
+        figure = plotly.graph_objects.Figure()
+        figure.update_layout(
+            title="Gamma emission",
+            xaxis={"title": "Energy [eV]", "type": xaxis_type},
+            yaxis={"title": "Activity [Bq/s]", "type": yaxis_type},
+            showlegend=True,
+        )
+
+    if fwhm is None:
+        en, probs = _line_coordinates(np.asarray(energies), np.asarray(intensities))
+        figure.add_trace(
+            plotly.graph_objects.Scatter(x=en, y=probs, mode="lines", name=name)
+        )
+    else:
+        if energy_bins is None:
+            # materials without gamma emitters have no lines to size the grid
+            # from so a grid up to 3 MeV is used
+            upper = 1.05 * np.max(energies) if len(energies) else 3e6
+            energy_bins = np.linspace(0, upper, 8193)
+        spectrum = get_broadened_gamma_emission(
+            energies, intensities, energy_bins, fwhm
+        )
+        figure.add_trace(
+            plotly.graph_objects.Scatter(
+                x=energy_bins[:-1], y=spectrum, line={"shape": "hv"}, name=name
+            )
+        )
+
+    if labels:
+        # annotations on log axes are positioned by the log of the value
+        x_log = figure.layout.xaxis.type == "log"
+        y_log = figure.layout.yaxis.type == "log"
+        for nuc, intensity, energy in labels:
+            if fwhm is not None:
+                # broadened lines are lower than the line intensity so the
+                # label is placed on the spectrum in the bin holding the line
+                index = np.searchsorted(energy_bins, energy, side="right") - 1
+                intensity = spectrum[np.clip(index, 0, len(spectrum) - 1)]
+            figure.add_annotation(
+                x=np.log10(energy) if x_log else energy,
+                y=np.log10(intensity) if y_log else intensity,
+                text=nuc,
+                showarrow=True,
+            )
+
+    return figure
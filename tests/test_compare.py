@@ -0,0 +1,78 @@
+import openmc
+from openmc_source_plotter import compare_sources, plot_source_comparison
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+
+@pytest.fixture
+def test_source():
+    my_source = openmc.IndependentSource()
+    my_source.space = openmc.stats.Point((4.0, 5.0, 6.0))
+    my_source.angle = openmc.stats.Isotropic()
+    my_source.energy = openmc.stats.Discrete([14e6], [1])
+    my_source.particle = "neutron"
+    return my_source
+
+
+@pytest.fixture
+def test_other_source():
+    my_source = openmc.IndependentSource()
+    my_source.space = openmc.stats.Point((1.0, 2.0, 3.0))
+    my_source.angle = openmc.stats.Isotropic()
+    my_source.energy = openmc.stats.Discrete([2.5e6], [1])
+    my_source.particle = "neutron"
+    return my_source
+
+
+def test_compare_same_source(test_source):
+    comparison = compare_sources(test_source, test_source, n_samples=100)
+    assert comparison["energy_ks_statistic"] == 0.0
+    assert comparison["energy_chi_square"] == 0.0
+    assert comparison["energy_wasserstein"] == 0.0
+    assert np.allclose(comparison["position_mean_a"], (4.0, 5.0, 6.0))
+    assert np.allclose(comparison["position_mean_a"], comparison["position_mean_b"])
+
+
+def test_compare_different_sources(test_source, test_other_source):
+    comparison = compare_sources(test_source, test_other_source, n_samples=100)
+    assert comparison["energy_ks_statistic"] == 1.0
+    assert comparison["energy_wasserstein"] == pytest.approx(14e6 - 2.5e6)
+    # no bins are shared so each sample contributes its full count
+    assert comparison["energy_chi_square"] == pytest.approx(200.0)
+    assert np.allclose(comparison["position_mean_b"], (1.0, 2.0, 3.0))
+    assert np.allclose(comparison["position_std_b"], 0.0)
+
+
+def test_comparison_plot(test_source, test_other_source):
+    comparison = compare_sources(
+        test_source,
+        test_other_source,
+        n_samples=10,
+        energy_bins=np.linspace(0, 20e6, 100),
+    )
+    plot = plot_source_comparison(comparison)
+    assert isinstance(plot, go.Figure)
+    assert len(plot.data) == 3
+
+
+def test_compare_one_source_outside_bins(test_source, test_other_source):
+    comparison = compare_sources(
+        test_source,
+        test_other_source,
+        n_samples=10,
+        energy_bins=np.linspace(10e6, 20e6, 11),
+    )
+    assert comparison["energy_chi_square"] == float("inf")
+    assert np.all(comparison["energy_probability_b"] == 0.0)
+    assert comparison["energy_probability_a"].sum() == pytest.approx(1.0)
+
+
+def test_compare_both_sources_outside_bins(test_source, test_other_source):
+    with pytest.raises(ValueError):
+        compare_sources(
+            test_source,
+            test_other_source,
+            n_samples=10,
+            energy_bins=np.linspace(0, 1e6, 11),
+        )
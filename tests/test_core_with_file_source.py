@@ -0,0 +1,111 @@
+import h5py
+import openmc
+from openmc_source_plotter import (
+    plot_source_energy,
+    plot_source_position,
+    plot_source_direction,
+)
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+
+@pytest.fixture
+def test_file_source(tmp_path):
+    particles = [
+        openmc.SourceParticle(r=(1.0, 2.0, 3.0), u=(0.0, 0.0, 1.0), E=14e6)
+        for _ in range(500)
+    ]
+    path = tmp_path / "source.h5"
+    openmc.write_source_file(particles, path)
+
+    return openmc.FileSource(path=path)
+
+
+def test_energy_plot(test_file_source):
+    plot = plot_source_energy(this=test_file_source, n_samples=10)
+    assert isinstance(plot, go.Figure)
+    assert len(plot.data[0]["x"]) == 1
+
+
+def test_position_plot(test_file_source):
+    plot = plot_source_position(this=test_file_source, n_samples=10)
+    assert isinstance(plot, go.Figure)
+    assert len(plot.data[0]["x"]) == 10
+    assert np.all(plot.data[0]["x"] == 1.0)
+    assert np.all(plot.data[0]["z"] == 3.0)
+
+
+def test_position_plot_more_samples_than_particles(test_file_source):
+    plot = plot_source_position(this=test_file_source, n_samples=1000)
+    assert len(plot.data[0]["x"]) == 500
+
+
+def test_direction_plot(test_file_source):
+    plot = plot_source_direction(this=test_file_source, n_samples=10)
+    assert isinstance(plot, go.Figure)
+    assert np.all(plot.data[1]["w"] == 1.0)
+
+
+def test_energy_plot_with_settings(test_file_source):
+    settings = openmc.Settings()
+    settings.particles = 1
+    settings.batches = 1
+    settings.source = test_file_source
+    plot = plot_source_energy(this=settings, n_samples=10)
+    assert isinstance(plot, go.Figure)
+    assert len(plot.data[0]["x"]) == 1
+
+
+@pytest.fixture
+def test_compressed_file_source(tmp_path):
+    particles = [
+        openmc.SourceParticle(r=(float(i), 2.0, 3.0), u=(0.0, 0.0, 1.0), E=14e6)
+        for i in range(500)
+    ]
+    path = tmp_path / "source.h5"
+    openmc.write_source_file(particles, path)
+
+    # rewrites the source bank as a chunked and compressed dataset
+    compressed_path = tmp_path / "compressed_source.h5"
+    with h5py.File(path, "r") as f_in, h5py.File(compressed_path, "w") as f_out:
+        for key, value in f_in.attrs.items():
+            f_out.attrs[key] = value
+        f_out.create_dataset(
+            "source_bank",
+            data=f_in["source_bank"][()],
+            chunks=(50,),
+            compression="gzip",
+        )
+
+    return openmc.FileSource(path=compressed_path)
+
+
+def test_position_plot_compressed(test_compressed_file_source):
+    plot = plot_source_position(this=test_compressed_file_source, n_samples=10)
+    x = plot.data[0]["x"]
+    assert len(x) == 10
+    assert len(set(x)) == 10
+    assert np.all(np.diff(x) > 0)
+    assert np.all(plot.data[0]["y"] == 2.0)
+
+
+def test_position_plot_compressed_all_particles(test_compressed_file_source):
+    plot = plot_source_position(this=test_compressed_file_source, n_samples=1000)
+    assert np.array_equal(plot.data[0]["x"], np.arange(500))
+
+
+def test_energy_plot_constrained_file_source(tmp_path):
+    if not hasattr(openmc.FileSource(), "constraints"):
+        pytest.skip("source constraints require openmc 0.15 or above")
+
+    particles = [openmc.SourceParticle(E=2.5e6) for _ in range(50)]
+    particles += [openmc.SourceParticle(E=14e6) for _ in range(50)]
+    path = tmp_path / "source.h5"
+    openmc.write_source_file(particles, path)
+
+    source = openmc.FileSource(path=path, constraints={"energy_bounds": [10e6, 20e6]})
+    plot = plot_source_energy(this=source, n_samples=20)
+    # only the 14 MeV particles are sampled, so there is a single bin
+    assert len(plot.data[0]["x"]) == 1
+    assert plot.data[0]["x"][0] == pytest.approx(14.0)
@@ -100,3 +100,50 @@ def test_direction_plot_with_figure(test_source):
     base_figure = go.Figure()
     plot = plot_source_direction(this=test_source, figure=base_figure, n_samples=10)
     assert isinstance(plot, go.Figure)
+
+
+def test_energy_plot_with_log_bins(test_source):
+    plot = plot_source_energy(
+        this=test_source, n_samples=10, energy_bins="log", n_energy_bins=50
+    )
+    assert isinstance(plot, go.Figure)
+    assert len(plot.data[0]["x"]) == 50
+    assert sum(plot.data[0]["y"]) == pytest.approx(1.0)
+
+
+def test_energy_plot_with_group_structure(test_source):
+    plot = plot_source_energy(
+        this=test_source, n_samples=10, energy_bins="CCFE-709", per_lethargy=True
+    )
+    assert isinstance(plot, go.Figure)
+    assert len(plot.data[0]["x"]) == 709
+    assert plot.layout.yaxis.title.text == "Probability per unit lethargy"
+
+
+def test_energy_plot_per_lethargy_with_zero_edge(test_source):
+    with pytest.raises(ValueError):
+        plot_source_energy(
+            this=test_source,
+            n_samples=10,
+            energy_bins=np.linspace(0, 20e6, 100),
+            per_lethargy=True,
+        )
+
+
+@pytest.mark.parametrize(
+    "bin_edges",
+    [
+        np.linspace(0, 20e6, 101),
+        np.geomspace(1e3, 20e6, 200),
+        np.array([0.0, 1e3, 1e5, 2e6, 20e6]),
+    ],
+)
+def test_histogram_energy_matches_numpy(bin_edges):
+    from openmc_source_plotter.core import _histogram_energy
+
+    rng = np.random.default_rng(1)
+    e_values = np.concatenate([rng.exponential(2e6, 200000), bin_edges])
+    assert np.array_equal(
+        _histogram_energy(e_values, bin_edges, block_size=1000),
+        np.histogram(e_values, bin_edges)[0],
+    )
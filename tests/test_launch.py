@@ -0,0 +1,147 @@
+import os
+import openmc
+from openmc_source_plotter.launch import (
+    find_inputs,
+    input_hash,
+    main,
+    referenced_files,
+)
+
+
+def make_settings(path, energy):
+    my_source = openmc.IndependentSource()
+    my_source.energy = openmc.stats.Discrete([energy], [1])
+
+    settings = openmc.Settings()
+    settings.particles = 1
+    settings.batches = 1
+    settings.source = my_source
+    settings.export_to_xml(path)
+
+
+def test_find_inputs(tmp_path):
+    (tmp_path / "a").mkdir()
+    make_settings(tmp_path / "a" / "settings.xml", 14e6)
+    openmc.Geometry([openmc.Cell()]).export_to_xml(tmp_path / "geometry.xml")
+
+    inputs = find_inputs(tmp_path)
+    assert inputs == [(tmp_path / "a" / "settings.xml", "settings")]
+
+
+def test_main_renders_and_skips_unchanged(tmp_path, capsys):
+    input_dir = tmp_path / "inputs"
+    output_dir = tmp_path / "outputs"
+    (input_dir / "a").mkdir(parents=True)
+    (input_dir / "b").mkdir(parents=True)
+    make_settings(input_dir / "a" / "settings.xml", 14e6)
+    make_settings(input_dir / "b" / "settings.xml", 2.5e6)
+
+    args = [
+        str(input_dir),
+        "-o",
+        str(output_dir),
+        "--plots",
+        "energy",
+        "position",
+        "--formats",
+        "json",
+        "-n",
+        "10",
+        "-w",
+        "2",
+    ]
+    assert main(args) == 0
+    for name in ["a/settings", "b/settings"]:
+        assert (output_dir / f"{name}_energy.json").exists()
+        assert (output_dir / f"{name}_position.json").exists()
+
+    make_settings(input_dir / "b" / "settings.xml", 3e6)
+    capsys.readouterr()
+    assert main(args) == 0
+    output = capsys.readouterr().out
+    assert "a/settings.xml: unchanged, skipped" in output
+    assert "rendered 1 of 1 inputs" in output
+
+
+def make_file_source_settings(directory):
+    particles = [openmc.SourceParticle(E=14e6) for _ in range(20)]
+    openmc.write_source_file(particles, directory / "source.h5")
+
+    settings = openmc.Settings()
+    settings.particles = 1
+    settings.batches = 1
+    settings.source = openmc.FileSource(path="source.h5")
+    settings.export_to_xml(directory / "settings.xml")
+
+
+def test_referenced_files_change_hash(tmp_path):
+    make_file_source_settings(tmp_path)
+    settings_file = tmp_path / "settings.xml"
+
+    assert referenced_files(settings_file) == [tmp_path / "source.h5"]
+
+    digest = input_hash(settings_file, {})
+    stat = (tmp_path / "source.h5").stat()
+    os.utime(tmp_path / "source.h5", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert input_hash(settings_file, {}) != digest
+
+
+def test_main_resolves_relative_source_file(tmp_path, monkeypatch):
+    input_dir = tmp_path / "inputs"
+    output_dir = tmp_path / "outputs"
+    input_dir.mkdir()
+    make_file_source_settings(input_dir)
+
+    # runs from a different directory to the input
+    monkeypatch.chdir(tmp_path)
+    args = [str(input_dir), "-o", str(output_dir), "--formats", "json", "-w", "1"]
+    assert main(args) == 0
+    assert (output_dir / "settings_energy.json").exists()
+
+
+def test_main_rerenders_when_label_top_changes(tmp_path, capsys):
+    input_dir = tmp_path / "inputs"
+    input_dir.mkdir()
+    make_settings(input_dir / "settings.xml", 14e6)
+
+    args = [str(input_dir), "-o", str(tmp_path / "out"), "-f", "json", "-w", "1"]
+    assert main(args) == 0
+    capsys.readouterr()
+    assert main(args + ["--label-top", "3"]) == 0
+    assert "rendered 1 of 1 inputs" in capsys.readouterr().out
+
+
+def test_main_outputs_do_not_clash(tmp_path):
+    input_dir = tmp_path / "inputs"
+    output_dir = tmp_path / "outputs"
+    (input_dir / "a_b").mkdir(parents=True)
+    (input_dir / "a").mkdir(parents=True)
+    make_settings(input_dir / "a_b" / "settings.xml", 14e6)
+    make_settings(input_dir / "a" / "b_settings.xml", 2.5e6)
+
+    args = [str(input_dir), "-o", str(output_dir), "-f", "json", "-n", "10"]
+    assert main(args) == 0
+    assert (output_dir / "a_b" / "settings_energy.json").exists()
+    assert (output_dir / "a" / "b_settings_energy.json").exists()
+
+
+def test_main_skips_inputs_without_applicable_plots(tmp_path, capsys):
+    input_dir = tmp_path / "inputs"
+    input_dir.mkdir()
+    openmc.Materials([openmc.Material()]).export_to_xml(input_dir / "materials.xml")
+
+    args = [str(input_dir), "-o", str(tmp_path / "out"), "-p", "energy", "-w", "1"]
+    assert main(args) == 0
+    output = capsys.readouterr().out
+    assert "materials.xml" not in output
+    assert "rendered 0 of 0 inputs" in output
+
+
+def test_input_hash_includes_extra_files(tmp_path):
+    make_settings(tmp_path / "settings.xml", 14e6)
+    chain_file = tmp_path / "chain.xml"
+    chain_file.write_text("<depletion_chain/>")
+
+    digest = input_hash(tmp_path / "settings.xml", {}, [chain_file])
+    chain_file.write_text("<depletion_chain></depletion_chain>")
+    assert input_hash(tmp_path / "settings.xml", {}, [chain_file]) != digest
@@ -0,0 +1,115 @@
+from openmc_source_plotter import (
+    get_broadened_gamma_emission,
+    plot_gamma_emission_spectrum,
+)
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+
+def test_gamma_emission_spectrum_plot():
+    energies = np.array([661.7e3, 1173.2e3, 1332.5e3])
+    intensities = np.array([5.0, 2.0, 2.0])
+    plot = plot_gamma_emission_spectrum(energies, intensities, name="test")
+    assert isinstance(plot, go.Figure)
+    assert list(plot.data[0]["x"]) == list(np.repeat(energies, 3))
+    assert list(plot.data[0]["y"]) == [0, 5, 0, 0, 2, 0, 0, 2, 0]
+
+
+def test_gamma_emission_spectrum_plot_with_labels():
+    plot = plot_gamma_emission_spectrum(
+        np.array([661.7e3]),
+        np.array([5.0]),
+        labels=[("Cs137", 5.0, 661.7e3)],
+        xaxis_type="log",
+    )
+    assert len(plot.layout.annotations) == 1
+    assert plot.layout.annotations[0].text == "Cs137"
+    assert plot.layout.annotations[0].x == np.log10(661.7e3)
+
+
+def test_gamma_emission_spectrum_plot_with_figure():
+    base_figure = go.Figure()
+    plot = plot_gamma_emission_spectrum(
+        np.array([661.7e3]), np.array([5.0]), figure=base_figure
+    )
+    plot = plot_gamma_emission_spectrum(
+        np.array([1173.2e3]), np.array([2.0]), figure=plot
+    )
+    assert len(plot.data) == 2
+
+
+def test_broadened_gamma_emission_conserves_intensity():
+    energy_bins = np.linspace(0, 2e6, 4001)
+    spectrum = get_broadened_gamma_emission(
+        np.array([661.7e3, 1173.2e3, 1332.5e3]),
+        np.array([5.0, 2.0, 2.0]),
+        energy_bins,
+        fwhm=lambda energy: 1e3 + 1e-3 * energy,
+    )
+    assert len(spectrum) == 4000
+    assert spectrum.sum() == pytest.approx(9.0)
+    centres = 0.5 * (energy_bins[1:] + energy_bins[:-1])
+    assert centres[np.argmax(spectrum)] == pytest.approx(661.7e3, abs=500)
+
+
+def test_broadened_gamma_emission_matches_gaussian():
+    energy_bins = np.linspace(0, 2e6, 4001)
+    spectrum = get_broadened_gamma_emission(
+        np.array([1e6]), np.array([1.0]), energy_bins, fwhm=10e3
+    )
+    centres = 0.5 * (energy_bins[1:] + energy_bins[:-1])
+    sigma = 10e3 / (2 * np.sqrt(2 * np.log(2)))
+    expected = np.exp(-0.5 * ((centres - 1e6) / sigma) ** 2)
+    expected *= 500 / (sigma * np.sqrt(2 * np.pi))
+    # widths are grouped to within 1 % so the match is approximate
+    assert np.allclose(spectrum, expected, atol=1e-2 * expected.max())
+
+
+def test_broadened_gamma_emission_uneven_bins():
+    with pytest.raises(ValueError):
+        get_broadened_gamma_emission(
+            np.array([1e6]), np.array([1.0]), np.geomspace(1, 2e6, 100), fwhm=1e3
+        )
+
+
+def test_broadened_gamma_emission_spectrum_plot():
+    plot = plot_gamma_emission_spectrum(
+        np.array([661.7e3, 1173.2e3]), np.array([5.0, 2.0]), fwhm=2e3
+    )
+    assert isinstance(plot, go.Figure)
+    assert len(plot.data[0]["x"]) == 8192
+
+
+def test_broadened_gamma_emission_no_lines():
+    spectrum = get_broadened_gamma_emission(
+        np.array([]), np.array([]), np.linspace(0, 2e6, 101), fwhm=1e3
+    )
+    assert np.array_equal(spectrum, np.zeros(100))
+
+
+def test_broadened_gamma_emission_lines_out_of_range():
+    spectrum = get_broadened_gamma_emission(
+        np.array([3e6]), np.array([1.0]), np.linspace(0, 2e6, 101), fwhm=1e3
+    )
+    assert np.array_equal(spectrum, np.zeros(100))
+
+
+def test_broadened_gamma_emission_spectrum_plot_no_lines():
+    plot = plot_gamma_emission_spectrum(np.array([]), np.array([]), fwhm=2e3)
+    assert len(plot.data[0]["x"]) == 8192
+    assert np.all(plot.data[0]["y"] == 0)
+
+
+def test_broadened_gamma_emission_spectrum_plot_labels_on_spectrum():
+    energy_bins = np.linspace(0, 2e6, 2001)
+    plot = plot_gamma_emission_spectrum(
+        np.array([661.7e3]),
+        np.array([5.0]),
+        labels=[("Cs137", 5.0, 661.7e3)],
+        fwhm=10e3,
+        energy_bins=energy_bins,
+    )
+    spectrum = plot.data[0]["y"]
+    assert plot.layout.annotations[0].y == spectrum[661]
+    assert plot.layout.annotations[0].y < 5.0